@@ -0,0 +1,50 @@
+import asyncio
+from functools import lru_cache
+from typing import Callable
+
+import httpx
+from groq import AsyncGroq
+
+from ai_companion.settings import settings
+
+# process-wide caps on in-flight requests per provider, so bursts queue up instead of running into rate limits
+GROQ_SEMAPHORE = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+GEMINI_SEMAPHORE = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+ELEVENLABS_SEMAPHORE = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+# callbacks that drop objects built on the shared clients, run when the shared clients are closed
+_RESET_HOOKS: list[Callable[[], None]] = []
+
+
+@lru_cache(maxsize=1)
+def get_groq_client() -> AsyncGroq:
+    """Get or create the Groq client shared by every Groq consumer, so they reuse one connection pool"""
+    return AsyncGroq(api_key=settings.GROQ_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the HTTP client shared by the SDK clients, so their requests reuse warm keep-alive connections"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=120.0,
+    )
+
+
+def register_reset_hook(hook: Callable[[], None]) -> None:
+    """Register a callback that drops an object built on the shared clients, so it's rebuilt after close_clients"""
+    _RESET_HOOKS.append(hook)
+
+
+async def close_clients() -> None:
+    """Close the shared clients that have been created"""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+
+    if get_groq_client.cache_info().currsize:
+        await get_groq_client().close()
+        get_groq_client.cache_clear()
+
+    for hook in _RESET_HOOKS:
+        hook()
@@ -0,0 +1,10 @@
+import os
+from functools import cache
+
+
+@cache
+def require_env_vars(*names: str) -> None:
+    """Validate that all the given environment variables are set; a passing check is cached for the process"""
+    missing_vars = [var for var in names if not os.getenv(var)]
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
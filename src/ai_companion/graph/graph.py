@@ -15,6 +15,7 @@ from ai_companion.graph.nodes import (
     memory_extraction_node,
     memory_injection_node,
     router_node,
+    summarize_conversation_node,
 )
 
 from ai_companion.graph.state import AICompanionState
@@ -30,13 +31,16 @@ def create_workflow_graph():
     graph_builder.add_node("memory_injection_node", memory_injection_node)
     graph_builder.add_node("conversation_node", conversation_node)
     graph_builder.add_node("image_node", image_node)
-    graph_builder.add_node("audio_mode", audio_node)
+    graph_builder.add_node("audio_node", audio_node)
+    graph_builder.add_node("summarize_conversation_node", summarize_conversation_node)
 
     # add edges
+    # memory extraction, routing and schedule context don't depend on each other, so they run as parallel branches
     graph_builder.add_edge(START, "memory_extraction_node")
-    graph_builder.add_edge("memory_extraction_node", "router_node")
-    graph_builder.add_edge("router_node", "context_injection_node")
-    graph_builder.add_edge("context_injection_node", "memory_injection_node")
+    graph_builder.add_edge(START, "router_node")
+    graph_builder.add_edge(START, "context_injection_node")
+    # memory injection waits for all three branches
+    graph_builder.add_edge(["memory_extraction_node", "router_node", "context_injection_node"], "memory_injection_node")
 
     # add conditional edges
     graph_builder.add_conditional_edges("memory_injection_node", select_workflow)
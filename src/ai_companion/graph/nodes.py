@@ -1,3 +1,4 @@
+import hashlib
 import os
 from uuid import uuid4
 
@@ -6,8 +7,8 @@ from langchain_core.runnables import RunnableConfig
 
 from ai_companion.graph.state import AICompanionState
 from ai_companion.graph.utils.chains import (
+    classify_workflow,
     get_character_response_chain,
-    get_router_chain
 )
 from ai_companion.graph.utils.helpers import (
     get_text_to_image_module,
@@ -21,9 +22,8 @@ from ai_companion.settings import settings
 
 
 async def router_node(state: AICompanionState):
-    chain = get_router_chain()
-    response = await chain.ainvoke({"messages": state["messages"][-settings.ROUTER_MESSAGES_TO_ANALYZE :]})
-    return {"workflow": response.response_type}
+    workflow = await classify_workflow(state["messages"][-settings.ROUTER_MESSAGES_TO_ANALYZE :])
+    return {"workflow": workflow}
 
 
 def context_injection_node(state: AICompanionState):
@@ -39,14 +39,16 @@ def context_injection_node(state: AICompanionState):
 async def conversation_node(state: AICompanionState, config: RunnableConfig):
     current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
+    summary = state.get("summary", "")
 
-    chain = get_character_response_chain(summary=state.get("summary", ""))
+    chain = get_character_response_chain(summary=summary)
 
     response = await chain.ainvoke(
         {
         "messages": state["messages"],
         "current_activity": current_activity,
         "memory_context": memory_context,
+        "summary": summary,
         },
         config
     )
@@ -56,8 +58,9 @@ async def conversation_node(state: AICompanionState, config: RunnableConfig):
 async def image_node(state: AICompanionState, config: RunnableConfig):
     current_activity = state.get("current_activity", "")
     memory_context = state.get("memory_context", "")
+    summary = state.get("summary", "")
 
-    chain = get_character_response_chain(state.get("summary", ""))
+    chain = get_character_response_chain(summary)
     text_to_image_module = get_text_to_image_module()
 
     scenario = await text_to_image_module.create_scenario(chat_history=state["messages"][-5:])
@@ -70,10 +73,11 @@ async def image_node(state: AICompanionState, config: RunnableConfig):
 
     updated_messages = state["messages"] + [scenario_message]
 
-    response = chain.ainvoke({
+    response = await chain.ainvoke({
         "messages": updated_messages,
         "current_activity": current_activity,
         "memory_context": memory_context,
+        "summary": summary,
     },
     config
     )
@@ -84,20 +88,22 @@ async def image_node(state: AICompanionState, config: RunnableConfig):
 async def audio_node(state: AICompanionState, config: RunnableConfig):
     current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
+    summary = state.get("summary", "")
 
-    chain = get_character_response_chain(state.get("summary", ""))
+    chain = get_character_response_chain(summary)
     text_to_speech_module = get_text_to_speech()
 
     response = await chain.ainvoke(
         {
             "messages": state["messages"],
             "current_activity": current_activity,
-            "memory_context": memory_context
+            "memory_context": memory_context,
+            "summary": summary,
         },
         config
     )
 
-    output_audio = text_to_speech_module.synthesize(response)
+    output_audio = await text_to_speech_module.synthesize(response)
 
     return {"messages": response, "audio_buffer": output_audio}
 
@@ -113,8 +119,8 @@ async def summarize_conversation_node(state: AICompanionState):
             "Create a summary of the conversation between Tela and the user so far. The summary must be a short description of the conversation so far, but that captures all the relevant information shared between Tela and the user."
         )
     
-    messages = state["messages"] + HumanMessage(content=summary_message)
-    response = model.ainvoke(messages)
+    messages = state["messages"] + [HumanMessage(content=summary_message)]
+    response = await model.ainvoke(messages)
 
     delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][: -settings.TOTAL_MESSAGES_AFTER_SUMMARY]]
     
@@ -135,9 +141,11 @@ def memory_injection_node(state: AICompanionState):
     """Retrieve and inject relevant memories into the character card"""
     memory_manager = get_memory_manager()
     
-    recent_context = [m.content for m in state["messages"][-3:]]
-    memories = memory_manager.get_relevant_memories(recent_context)
+    # only the top-k memories relevant to the latest user message are injected
+    latest_user_message = next((m.content for m in reversed(state["messages"]) if m.type == "human"), "")
+    memories = memory_manager.get_relevant_memories(str(latest_user_message))
 
     memory_context = memory_manager.format_memories_for_prompt(memories=memories)
+    memory_context_version = hashlib.md5(memory_context.encode(), usedforsecurity=False).hexdigest()[:8]
 
-    return {"memory_context": memory_context}
+    return {"memory_context": memory_context, "memory_context_version": memory_context_version}
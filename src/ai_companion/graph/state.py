@@ -13,6 +13,7 @@ class AICompanionState(MessagesState):
         current_activity(str): The current activity of Tela based on the schedule
         apply_activity(bool): Flag indicating whether a new activity should be applied.
         memory_context(str): The context of the memories to be injected into the character card.
+        memory_context_version(str): Short hash of memory_context, for reusing work done for the same memories.
     """
 
     summary: str
@@ -22,3 +23,4 @@ class AICompanionState(MessagesState):
     current_activity: str
     apply_activity: bool
     memory_context: str
+    memory_context_version: str
@@ -1,14 +1,27 @@
 # this file essentially defines the conversation flow with Tela. It sets up the logic for how user inputs are processed, routed, and answered by the agent.
+import hashlib
+import string
+from functools import lru_cache
+
+from cachetools import LRUCache
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import MessagesPlaceholder, ChatPromptTemplate
 from pydantic import BaseModel, Field
 
-from ai_companion.core.prompts import CHARACTER_CARD_PROMPT, ROUTER_PROMPT
+from ai_companion.core.prompts import CHARACTER_CARD_PROMPT, CHARACTER_CONTEXT_PROMPT, ROUTER_PROMPT
+from ai_companion.core.clients import register_reset_hook
 from ai_companion.graph.utils.helpers import AsteriskRemovalParser, get_chat_model
 
+# router decisions keyed on a hash of the normalized message window; windows rarely repeat past a chat's
+# first turn, so hits are mostly identical opening messages
+_ROUTER_CACHE: LRUCache = LRUCache(maxsize=4096)
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
 
 class RouterResponse(BaseModel):
     response_type: str = Field(..., description="The response type to give to the user. It must be one of 'conversation', 'image' or 'audio'")
 
+@lru_cache(maxsize=1)
 def get_router_chain():
     model = get_chat_model(temperature=0.3).with_structured_output(RouterResponse)
     
@@ -21,18 +34,61 @@ def get_router_chain():
     return prompt | model
 
 
+def _normalize_router_query(text: str) -> str:
+    """Lowercase the text, strip punctuation and collapse whitespace"""
+    return " ".join(text.lower().translate(_PUNCTUATION_TABLE).split())
+
+
+async def classify_workflow(messages: list[BaseMessage]) -> str:
+    """Classify the workflow for the given messages, reusing earlier decisions for the same message window"""
+    # the whole window the router sees is the key, so context-dependent replies like "yes" aren't shared across chats;
+    # it's hashed so the cache doesn't keep copies of the messages
+    window = "\n".join(f"{msg.type}: {_normalize_router_query(str(msg.content))}" for msg in messages)
+    cache_key = hashlib.sha256(window.encode("utf-8")).hexdigest() if messages else ""
+
+    if cache_key and cache_key in _ROUTER_CACHE:
+        return _ROUTER_CACHE[cache_key]
+
+    response = await get_router_chain().ainvoke({"messages": messages})
+    if cache_key:
+        _ROUTER_CACHE[cache_key] = response.response_type
+    return response.response_type
+
+
 def get_character_response_chain(summary: str):
+    """Get the character response chain; the summary itself is passed as the "summary" input at invoke time"""
+    return _build_character_response_chain(with_summary=bool(summary))
+
+
+@lru_cache(maxsize=2)
+def _build_character_response_chain(with_summary: bool):
     model = get_chat_model()
-    system_message = CHARACTER_CARD_PROMPT
 
-    if summary:
-        system_message += f"\n\nSummary of conversations earlier between Tela and the user: {summary}"
+    # the character card never changes, so it goes first; per-turn context follows as separate system messages
+    system_messages = [
+        ("system", CHARACTER_CARD_PROMPT),
+        ("system", CHARACTER_CONTEXT_PROMPT),
+    ]
+
+    if with_summary:
+        system_messages.append(("system", "Summary of conversations earlier between Tela and the user: {summary}"))
     
     prompt = ChatPromptTemplate.from_messages(
         [
-            ("system", system_message),
+            *system_messages,
             MessagesPlaceholder(variable_name="messages"),
         ]
     )
     
     return prompt | model | AsteriskRemovalParser()
+
+
+register_reset_hook(get_router_chain.cache_clear)
+register_reset_hook(_build_character_response_chain.cache_clear)
+
+
+def warm_up_chains() -> None:
+    """Build every cached chain up front so the first message doesn't pay for it"""
+    get_router_chain()
+    for with_summary in (False, True):
+        _build_character_response_chain(with_summary=with_summary)
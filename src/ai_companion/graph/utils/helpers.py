@@ -1,33 +1,52 @@
 import re
+from functools import lru_cache
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
 
+from ai_companion.core.clients import get_groq_client, register_reset_hook
 from ai_companion.modules.image import ImageToText
 from ai_companion.modules.image import TextToImage
-from ai_companion.modules.speech import TextToSpeech
+from ai_companion.modules.speech import SpeechToText, TextToSpeech
 from ai_companion.settings import settings
 
+# equivalent to r"\*.*?\*" (the lazy dot stops at the first "*" and never crosses a newline) without backtracking
+_ASTERISK_RE = re.compile(r"\*[^*\n]*\*")
 
+
+@lru_cache
 def get_chat_model(temperature: float=0.7):
     return ChatGroq(
         api_key=settings.GROQ_API_KEY,
         model=settings.TEXT_MODEL_NAME,
         temperature=temperature,
+        async_client=get_groq_client().chat.completions,
     )
 
-def get_image_to_text_module():
-    return ImageToText
+# the modules are created on first use and shared by the whole process, so their API clients are built once
+@lru_cache(maxsize=1)
+def get_image_to_text_module() -> ImageToText:
+    return ImageToText()
+
+@lru_cache(maxsize=1)
+def get_text_to_image_module() -> TextToImage:
+    return TextToImage()
+
+@lru_cache(maxsize=1)
+def get_text_to_speech() -> TextToSpeech:
+    return TextToSpeech()
 
-def get_text_to_image_module():
-    return TextToImage
+@lru_cache(maxsize=1)
+def get_speech_to_text() -> SpeechToText:
+    return SpeechToText()
 
-def get_text_to_speech():
-    return TextToSpeech
+# the cached models and modules hold the shared Groq client, so they're rebuilt once it's closed
+register_reset_hook(get_chat_model.cache_clear)
+register_reset_hook(get_text_to_image_module.cache_clear)
 
 def remove_asterisk_content(text: str) -> str:
     """Remove content between asterisks from the text"""
-    return re.sub(r"\*.*?\*", "", text).strip()
+    return _ASTERISK_RE.sub("", text).strip()
 
 
 class AsteriskRemovalParser(StrOutputParser):
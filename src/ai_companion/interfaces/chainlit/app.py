@@ -1,29 +1,47 @@
+import asyncio
 from io import BytesIO
 
+import anyio
 import chainlit as cl
-from langchain_core.messages import AIMessageChunk, HumanMessage
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langchain_core.messages import HumanMessage
 
 from ai_companion.graph import graph_builder
-from ai_companion.modules.image import ImageToText
+from ai_companion.modules.memory.short_term.sqlite_saver import create_short_term_memory
 
-# Input processing modules (ImageToText, SpeechToText): Imported at interface level to process user uploads app.py:7-9 
-# TextToSpeech: Imported at interface level because audio responses need synthesis after graph processing in the audio workflow 
-# TextToImage: Not imported because image generation is fully self-contained within the graph workflow
+# Input processing modules (ImageToText, SpeechToText): Used at interface level to process user uploads
+# TextToSpeech: Used at interface level because audio responses need synthesis after graph processing in the audio workflow 
+# TextToImage: Not used because image generation is fully self-contained within the graph workflow
+# All of them are lazily created, process-wide instances shared with the graph nodes
 
-from ai_companion.modules.speech import SpeechToText, TextToSpeech
-from ai_companion.settings import settings
+from ai_companion.graph.utils.helpers import (
+    get_image_to_text_module,
+    get_speech_to_text,
+    get_text_to_speech,
+)
 
+# streamed tokens are coalesced into micro-batches so each websocket write to the UI carries several tokens
+STREAM_FLUSH_TOKENS = 8
+STREAM_FLUSH_INTERVAL = 0.03
 
-# global module instances
-speech_to_text = SpeechToText()
-text_to_speech = TextToSpeech()
-image_to_text = ImageToText()
+# the graph is compiled once per process against a long-lived SQLite connection instead of once per message
+_compiled_graph = None
+_compiled_graph_lock = asyncio.Lock()
+
+
+async def get_compiled_graph():
+    """Get or compile the workflow graph with a shared short-term memory checkpointer"""
+    global _compiled_graph
+    async with _compiled_graph_lock:
+        if _compiled_graph is None:
+            short_term_memory = await create_short_term_memory()
+            _compiled_graph = graph_builder.compile(checkpointer=short_term_memory)
+    return _compiled_graph
 
 
 @cl.on_chat_start
 async def on_chat_start():
     """Initialize the chat session"""
+    cl.user_session.set("graph", await get_compiled_graph())
     cl.user_session.set("thread_id", 1) # With the current hardcoded thread_id = 1 configuration in the Chainlit interface, you have one continuous conversation thread that persists across all sessions
 
 
@@ -38,13 +56,13 @@ async def on_message(message: cl.Message):
     if message.elements:# message.elements is a list of media attachments associated with the message
         for elem in message.elements:
             if isinstance(elem, cl.Image):
-                with open(elem.path, "rb") as f:
-                    image_bytes = f.read()
+                async with await anyio.open_file(elem.path, "rb") as f:
+                    image_bytes = await f.read()
                 
                 # analyze the image and add to the message content
                 try:
-                    description = await image_to_text.analyze_image(
-                        image_data=image_bytes,
+                    description = await get_image_to_text_module().analyze_image(
+                        image_data=memoryview(image_bytes),
                         prompt="Please describe what you see in this image in the context of our conversation.",
                     )
                     content = f"\n[Image Analysis: {description}]"
@@ -52,23 +70,32 @@ async def on_message(message: cl.Message):
                     cl.logger.warning(f"Failed to analyze image: {e}")
 
     thread_id = cl.user_session.get("thread_id")
+    graph = cl.user_session.get("graph")
 
     async with cl.Step(type="run"):
-        async with AsyncSqliteSaver.from_conn_string(conn_string=settings.SHORT_TERM_MEMORY_DB_PATH) as short_term_memory:
-            graph = graph_builder.compile(checkpointer=short_term_memory)
-            async for chunk in graph.astream(
-                {"messages": [HumanMessage(content=content)]},
-                {"configurable": {"thread_id": thread_id}},
-                stream_mode="messages",
-            ):
-                # chunk[0] - The message content itself (the actual AIMessageChunk object containing the text being generated)
-                # chunk[1] - The metadata dictionary containing information about where this chunk came from, including the "langgraph_node" key that identifies which node in the graph produced this chunk
-                if chunk[1]["langgraph_node"] == "conversation_node" and isinstance(chunk[0], AIMessageChunk):
-                    await empty_msg.stream_token(chunk[0].content)
-                
-            output_state = await graph.aget_state(config={"configurable": {"thread_id": thread_id}})
+        loop = asyncio.get_running_loop()
+        pending: list[str] = []
+        last_flush = loop.time()
 
-            # The key distinction: async with is for resource management (like database connections), async for is for iterating over async streams, and async def declares functions that can perform async operation
+        async for event in graph.astream_events(
+            {"messages": [HumanMessage(content=content)]},
+            {"configurable": {"thread_id": thread_id}},
+            version="v2",
+        ):
+            # only the tokens generated by the conversation node are shown to the user
+            if event["event"] == "on_chat_model_stream" and event["metadata"].get("langgraph_node") == "conversation_node":
+                pending.append(event["data"]["chunk"].content)
+                if len(pending) >= STREAM_FLUSH_TOKENS or loop.time() - last_flush > STREAM_FLUSH_INTERVAL:
+                    await empty_msg.stream_token("".join(pending))
+                    pending.clear()
+                    last_flush = loop.time()
+
+        if pending:
+            await empty_msg.stream_token("".join(pending))
+
+        output_state = await graph.aget_state(config={"configurable": {"thread_id": thread_id}})
+
+        # The key distinction: async with is for resource management (like database connections), async for is for iterating over async streams, and async def declares functions that can perform async operation
     
     if output_state.values.get("workflow") == "audio":
         response = output_state.values["messages"][-1].content
@@ -105,30 +132,32 @@ async def on_audio_end(elements): # This allows the function to accept additiona
     """Handle audio data from audio buffer"""
     # get audio data
     audio_buffer = cl.user_session.get("audio_buffer")
-    audio_buffer.seek(0) # retrieve audio from the beginning
-    audio_data = audio_buffer.read()
+    audio_data = audio_buffer.getvalue() # the whole buffer, without seeking back and reading it into a new copy
 
     # show user's audio message
     input_audio_element = cl.Audio(mime="audio/mpeg3", content=audio_data)
     await cl.Message(author="You", content="", elements=[input_audio_element, *elements]).send()
 
 
-    # use the global SpeechToText instance
-    transcription = await speech_to_text.transcribe(audio_data)
+    # use the shared SpeechToText instance
+    transcription = await get_speech_to_text().transcribe(audio_data)
 
     thread_id = cl.user_session.get("thread_id")
 
     # Without lines 123-139, the user's voice message would be transcribed but never answered. Without lines 120-128, the AI would generate a text response but the user wouldn't hear it as audio - breaking the voice conversation experience.
 
-    async with AsyncSqliteSaver.from_conn_string(settings.SHORT_TERM_MEMORY_DB_PATH) as short_term_memory:
-        graph = graph_builder.compile(checkpointer=short_term_memory)
-        output_state = await graph.ainvoke(
-            {"messages": [HumanMessage(content=transcription)]},
-            {"configurable": {"thread_id": thread_id}},
-        )
+    graph = cl.user_session.get("graph")
+    config = {"configurable": {"thread_id": thread_id}}
+    output_state = await graph.ainvoke(
+        {"messages": [HumanMessage(content=transcription)]},
+        config,
+    )
+
+    # the turn's last checkpoint must be persisted before the reply is shown
+    await graph.checkpointer.aflush(config)
 
-    # use global TextToSpeech instance
-    audio_buffer = await text_to_speech.synthesize(output_state["messages"][-1].content)
+    # use the shared TextToSpeech instance
+    audio_buffer = await get_text_to_speech().synthesize(output_state["messages"][-1].content)
 
     output_audio_element = cl.Audio(
         name="Audio",
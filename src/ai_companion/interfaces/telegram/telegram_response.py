@@ -1,29 +1,29 @@
 import os
 import logging
-from io import BytesIO
-from typing import Dict
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
 
 import httpx
 from fastapi import APIRouter, Request, Response, Header
 from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
-from graph import graph_builder
-from ai_companion.modules.image import ImageToText
-from ai_companion.modules.speech import SpeechToText, TextToSpeech
-from ai_companion.settings import settings
+from ai_companion.graph.utils.helpers import (
+    get_image_to_text_module,
+    get_speech_to_text,
+    remove_asterisk_content,
+)
 
 logger = logging.getLogger(__name__)
 
-image_to_text = ImageToText()
-speech_to_text = SpeechToText()
-text_to_speech = TextToSpeech()
-
 telegram_router = APIRouter()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 SECRET_WEBHOOK_TOKEN = os.getenv("SECRET_WEBHOOK_TOKEN")
 
+# Telegram rate-limits message edits to about one per second per chat
+TELEGRAM_EDIT_INTERVAL = 1.0
+
 @telegram_router.api_route(path="/telegram_response.py", methods=[ "POST"]) # Telegram ignores GET for webhooks
 async def telegram_handler(
     request: Request,
@@ -31,27 +31,31 @@ async def telegram_handler(
     ) -> Response:
     """Handle incoming messages and status updates from Telegram Cloud API."""
     
-    if request.method == "POST":
-        if x_telegram_bot_api_secret_token != SECRET_WEBHOOK_TOKEN:
-            return Response(content="Token mismatch", status_code=403)
-        return Response(content="Received Telegram data", status_code=200)
+    if x_telegram_bot_api_secret_token != SECRET_WEBHOOK_TOKEN:
+        return Response(content="Token mismatch", status_code=403)
 
     try:
         update_payload = await request.json()
 
         if "message" in update_payload:
-            msg_dict = update_payload["message"][0]
+            msg_dict = update_payload["message"]
             from_id = msg_dict["from"]["id"]
             session_id = msg_dict["from"]["id"]
 
+            # a single pooled client is shared by every Telegram call so keep-alive connections are reused
+            client = request.app.state.http_client
+
+            # getFile -> download -> transcription/analysis -> graph run each need the previous step's result,
+            # so media messages are processed sequentially
             content = ""
             if "audio" in msg_dict:
-                content = await process_audio_message(msg_dict)
+                content = await process_audio_message(client, msg_dict)
             elif "photo" in msg_dict:
                 content = msg_dict.get("caption", "")
-                image_bytes = await download_media(msg_dict["photo"]["file_id"])
+                # photo is a list of sizes of the same image, the last one being the largest
+                image_bytes = await download_media(client, msg_dict["photo"][-1]["file_id"])
                 try:
-                    description = await image_to_text.analyze_image(
+                    description = await get_image_to_text_module().analyze_image(
                         image_data=image_bytes,
                         prompt="Please describe what you see in this image in the context of our conversation.",
                     )
@@ -61,31 +65,60 @@ async def telegram_handler(
             else:
                 content = msg_dict["text"]
 
-            # process the message through the graph agent
-            async with AsyncSqliteSaver.from_conn_string(settings.SHORT_TERM_MEMORY_DB_PATH) as short_term_memory:
-                graph = graph_builder.compile(checkpointer=short_term_memory)
-                await graph.ainvoke(
-                    {"messages": [HumanMessage(content=content)]},
-                    {"configurable": {"thread_id": session_id}}
-                )
-
-                # get the workflow type and response from the state
-                output_state = graph.aget_state(config={"configurable": {"thread_id": session_id}})
-
-            workflow = output_state.values.get("workflow", "conversation")
-            response_message = output_state.values["messages"][-1].content # extracts the AI-generated response that will be sent back to the WhatsApp user
+            # process the message through the graph agent compiled once in the app lifespan,
+            # streaming the conversation node's reply into a message that is edited as tokens arrive
+            graph = request.app.state.graph
+            config = {"configurable": {"thread_id": session_id}}
+            final_state = {}
+            message_id = None
+            placeholder_sent = False
+            streamed_text = ""
+            sent_text = ""
+            last_edit = 0.0
+
+            async for event in graph.astream_events(
+                {"messages": [HumanMessage(content=content)]},
+                config,
+                version="v2",
+            ):
+                # the root run's output is the final graph state, so it doesn't have to be read back from the checkpointer
+                if event["event"] == "on_chain_end" and not event["parent_ids"]:
+                    final_state = event["data"]["output"]
+                    continue
+
+                if event["event"] != "on_chat_model_stream" or event["metadata"].get("langgraph_node") != "conversation_node":
+                    continue
+
+                streamed_text += event["data"]["chunk"].content
+                if not placeholder_sent:
+                    placeholder_sent = True
+                    message_id = await send_message(client, from_id, "…")
+                    last_edit = time.monotonic()
+                elif time.monotonic() - last_edit >= TELEGRAM_EDIT_INTERVAL:
+                    partial_text = remove_asterisk_content(streamed_text)
+                    if partial_text and partial_text != sent_text:
+                        await edit_message_text(client, from_id, message_id, partial_text)
+                        sent_text = partial_text
+                    last_edit = time.monotonic()
+
+            # the turn's last checkpoint must be persisted before the reply is acknowledged
+            await graph.checkpointer.aflush(config)
+
+            # get the workflow type and response from the final state
+            workflow = final_state.get("workflow", "conversation")
+            response_message = final_state["messages"][-1].content # extracts the AI-generated response that will be sent back to the WhatsApp user
 
 
             if workflow == "audio":
-                audio_buffer = output_state.values["audio_buffer"]
-                success = await send_response(from_id, response_message, "audio", audio_buffer)
+                audio_buffer = final_state["audio_buffer"]
+                success = await send_response(client, from_id, response_message, "audio", audio_buffer)
             elif workflow == "image":
-                image_path = output_state.values["image_path"]
-                with open(image_path, "rb") as f:
-                    image_data = f.read()
-                success = await send_response(from_id, response_message, "image", image_data)
+                image_path = Path(final_state["image_path"])
+                success = await send_response(client, from_id, response_message, "image", image_path)
+            elif message_id is not None:
+                success = response_message == sent_text or await edit_message_text(client, from_id, message_id, response_message)
             else:
-                success = await send_response(from_id, response_message, "text")
+                success = await send_response(client, from_id, response_message, "text")
             
 
             if not success:
@@ -101,93 +134,116 @@ async def telegram_handler(
         return Response(content="Internal server error", status_code=500)
     
       
-async def download_media(media_id: str) -> bytes:
+async def download_media(client: httpx.AsyncClient, media_id: str) -> bytes:
     """Download media from Telegram via media id"""
    
    # step 1: get the media path for the media id
     media_metadata_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getFile"
     params={"file_id": media_id}
 
+    metadata_response = await client.get(url=media_metadata_url, params=params)
+    metadata_response.raise_for_status()
+    metadata = metadata_response.json()
+    media_path = metadata["result"]["file_path"]
 
-    async with httpx.AsyncClient() as client:
-        metadata_response = await client.get(url=media_metadata_url, params=params)
-        metadata_response.raise_for_status()
-        metadata = metadata_response.json()
-        media_path = metadata["results"]["file_path"]
-
-        # step 2: construct the download url and fetch the content
-        download_url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{media_path}"
-        media_response = await client.get(download_url)
-        media_response.raise_for_status()
-        return media_response.content
+    # step 2: construct the download url and fetch the content over the same kept-alive connection
+    download_url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{media_path}"
+    media_response = await client.get(download_url)
+    media_response.raise_for_status()
+    return media_response.content
     
 
-async def process_audio_message(msg_dict: Dict) -> str:
+async def process_audio_message(client: httpx.AsyncClient, msg_dict: Dict) -> str:
     """Download and transcribe audio message"""
     audio_id = msg_dict["audio"]["file_id"]
     media_data_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getFile"
     params = {"file_id": audio_id}
 
-    async with httpx.AsyncClient() as client:
-        metadata_response = await client.get(url=media_data_url, params=params)
-        metadata_response.raise_for_status()
-        metadata = metadata_response.json()
-        media_path = metadata["results"]["file_path"]
+    metadata_response = await client.get(url=media_data_url, params=params)
+    metadata_response.raise_for_status()
+    metadata = metadata_response.json()
+    media_path = metadata["result"]["file_path"]
 
     # download the audio file
-    async with httpx.AsyncClient() as client:
-        download_url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{media_path}"
-        audio_response = await client.get(url=download_url, params=params)
-        audio_response.raise_for_status()
+    download_url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{media_path}"
+    audio_response = await client.get(url=download_url, params=params)
+    audio_response.raise_for_status()
+
+    # the downloaded bytes go straight to transcription
+    return await get_speech_to_text().transcribe(audio_response.content)
+
+async def send_message(client: httpx.AsyncClient, from_id: int, text: str) -> Optional[int]:
+    """Send a text message and return its message id so it can be edited later"""
+    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    try:
+        resp = await client.post(url=url, data={"chat_id": from_id, "text": text})
+        resp.raise_for_status()
+        return resp.json()["result"]["message_id"]
+    except Exception as e:
+        logger.warning(f"Message send failed: {e}")
+        return None
 
-    # prepare for transcription
-    audio_buffer = BytesIO(audio_response.content)
-    audio_buffer.seek(0)
-    audio_data = audio_buffer.read()
 
-    return await speech_to_text.transcribe(audio_data)
+async def edit_message_text(client: httpx.AsyncClient, from_id: int, message_id: Optional[int], text: str) -> bool:
+    """Replace the text of a previously sent message"""
+    if message_id is None:
+        return False
+
+    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/editMessageText"
+    try:
+        resp = await client.post(url=url, data={"chat_id": from_id, "message_id": message_id, "text": text})
+        return resp.status_code == 200
+    except Exception as e:
+        logger.warning(f"Message edit failed: {e}")
+        return False
+
 
 #  The Telegram Bot API uses different endpoints and payload structures for each media type, but you can wrap them in a unified function.
 
 # # To upload media for Telegram, you do not use a separate upload endpoint (like WhatsApp's /media). Instead, you upload media as part of sending a message (e.g., photo, audio, document, video, etc.) by making a multipart HTTP POST request to the appropriate send method (like /sendPhoto, /sendAudio, etc.)
 async def send_response(
+        client: httpx.AsyncClient,
         from_id: int,
         response_message: str,
         message_type: str = "text",
-        media_content: bytes = None,
+        media_content: Union[bytes, Path, None] = None,
 ) -> bool:
     """Send response messages via the Telegram API"""
 
     BASE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
     try:
-
-        async with httpx.AsyncClient() as client:
-                if message_type == "text":
-                    url = f"{BASE_URL}/sendMessage"
-                    payload = {"chat_id": from_id, "text": response_message}
-                    resp = await client.post(url=url, data=payload)
-                    return resp.status_code == 200
-                
-                elif message_type == "image":                
-                    # When you successfully send a media message (photo, audio, etc.), Telegram returns a "file_id" for each uploaded file in the response.
-
-                    url = f"{BASE_URL}/sendPhoto"
-                    payload = {"chat_id": from_id}
-                    if response_message:
-                        payload["caption"] = response_message
-                        # If media_content is bytes, you should wrap it as a tuple. httpx requires (filename, bytes, mimetype).
-                    files = {"photo": ("image.jpg", media_content, "image/jpeg")}
-                    resp = await client.post(url=url, data=payload, files=files)
-                    return resp.status_code == 200
-                elif message_type == "audio":
-                    url = f"{BASE_URL}/sendAudio"
-                    payload = {"chat_id": from_id}
-                    files = {"audio": ("file.mp3", media_content, "audio/mpeg")}
+        if message_type == "text":
+            url = f"{BASE_URL}/sendMessage"
+            payload = {"chat_id": from_id, "text": response_message}
+            resp = await client.post(url=url, data=payload)
+            return resp.status_code == 200
+        
+        elif message_type == "image":                
+            # When you successfully send a media message (photo, audio, etc.), Telegram returns a "file_id" for each uploaded file in the response.
+
+            url = f"{BASE_URL}/sendPhoto"
+            payload = {"chat_id": from_id}
+            if response_message:
+                payload["caption"] = response_message
+                # If media_content is bytes, you should wrap it as a tuple. httpx requires (filename, bytes, mimetype).
+            if isinstance(media_content, Path):
+                # an open file lets httpx read the multipart body from disk in chunks instead of buffering the whole image
+                with media_content.open("rb") as image_file:
+                    files = {"photo": ("image.jpg", image_file, "image/jpeg")}
                     resp = await client.post(url=url, data=payload, files=files)
-                    return resp.status_code == 200
-                else:
-                    logger.error("Unsupported message_type")
-                    return False
+            else:
+                files = {"photo": ("image.jpg", media_content, "image/jpeg")}
+                resp = await client.post(url=url, data=payload, files=files)
+            return resp.status_code == 200
+        elif message_type == "audio":
+            url = f"{BASE_URL}/sendAudio"
+            payload = {"chat_id": from_id}
+            files = {"audio": ("file.mp3", media_content, "audio/mpeg")}
+            resp = await client.post(url=url, data=payload, files=files)
+            return resp.status_code == 200
+        else:
+            logger.error("Unsupported message_type")
+            return False
     
     except Exception as e:
         logger.error(f"Message send failed: {e}")
@@ -1,7 +1,42 @@
+from contextlib import asynccontextmanager
+
+import httpx
 from fastapi import FastAPI
 
+from ai_companion.core.clients import close_clients, get_groq_client
+from ai_companion.graph import graph_builder
+from ai_companion.graph.utils.chains import warm_up_chains
+from ai_companion.graph.utils.helpers import get_image_to_text_module, get_speech_to_text, get_text_to_speech
 from ai_companion.interfaces.telegram.telegram_response import telegram_router
+from ai_companion.modules.memory.long_term.vector_store import get_vector_store
+from ai_companion.modules.memory.short_term.sqlite_saver import create_short_term_memory
+
+
+def _warm_up() -> None:
+    """Build the chains, API clients and embedding model before the first message arrives"""
+    warm_up_chains()
+    get_groq_client()
+    get_image_to_text_module()
+    get_speech_to_text()
+    get_text_to_speech()
+    get_vector_store()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the short-term memory and the Telegram HTTP client once for the lifetime of the app"""
+    _warm_up()
+    short_term_memory = await create_short_term_memory()
+    try:
+        async with httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=32), timeout=30.0) as http_client:
+            app.state.graph = graph_builder.compile(checkpointer=short_term_memory)
+            app.state.http_client = http_client
+            yield
+    finally:
+        await short_term_memory.aclose()
+        await close_clients()
+
 
 # Initializes a FastAPI instance that will serve as the web server
-app = FastAPI()
-app.include_router(telegram_router)
\ No newline at end of file
+app = FastAPI(lifespan=lifespan)
+app.include_router(telegram_router)
@@ -1,11 +1,16 @@
-import base64
+import asyncio
 import logging
 import os
-from typing import Union, Optional
+from typing import Union
 
+import anyio
+
+from ai_companion.core.clients import get_groq_client
+from ai_companion.core.env import require_env_vars
 from ai_companion.core.exceptions import ImageToTextError
 from ai_companion.settings import settings
-from groq import Groq
+from groq import AsyncGroq
+from pybase64 import b64encode_as_string
 
 
 class ImageToText:
@@ -14,29 +19,19 @@ class ImageToText:
     REQUIRED_ENV_VARS=["GROQ_API_KEY"]
 
     def __init__(self):
-        self._validate_env_vars()
-        self._client = Optional[Groq] = None
+        require_env_vars(*self.REQUIRED_ENV_VARS)
         self._logger = logging.getLogger(__name__)
 
-    def _validate_env_vars(self) -> None:
-        """Validate that all the required environment variables are set"""
-        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
-        if missing_vars:
-            raise ValueError(f"Missing required environment variables: {", ".join(missing_vars)}")
-        
     @property
-    def client(self) -> Groq:
-        """Get or create Groq client instance using the singleton pattern"""
-        if self._client is None:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
-        return self._client
+    def client(self) -> AsyncGroq:
+        return get_groq_client()
     
 
-    async def analyze_image(self, image_data: Union[str, bytes], prompt: str="") -> str:
+    async def analyze_image(self, image_data: Union[str, bytes, memoryview], prompt: str="") -> str:
         """Analyzes an image using Groq's vision capabilites.
         
         Args:
-            image_data: Either a file path(str) or binary image data(bytes)
+            image_data: Either a file path(str) or binary image data(bytes or a memoryview over them)
             prompt: Optional prompt to gude image analysis
         
         Returns:
@@ -52,8 +47,8 @@ class ImageToText:
             if isinstance(image_data, str):
                 if not os.path.exists(path=image_data):
                     raise ValueError(f"Image file not found: {image_data}")
-                with open(image_data, "rb") as f:
-                    image_bytes=f.read()
+                async with await anyio.open_file(image_data, "rb") as f:
+                    image_bytes = await f.read()
             
             else:
                 image_bytes = image_data
@@ -61,7 +56,8 @@ class ImageToText:
             if not image_bytes:
                 raise ValueError("Image data cannot be empty")
             
-            base64_image = base64.b64encode(image_bytes).decode("utf-8")
+            # encoding megabyte-sized images is CPU work, so it runs off the event loop
+            base64_image = await asyncio.to_thread(b64encode_as_string, image_bytes)
 
             if not prompt:
                 prompt = "Please describe what you see in this image in detail."
@@ -77,7 +73,7 @@ class ImageToText:
             ]
 
             # make the API call
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 messages=messages,
                 model=settings.ITT_MODEL_NAME,
                 max_tokens=1000,
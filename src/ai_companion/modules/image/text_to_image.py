@@ -1,17 +1,28 @@
-import base64
+import asyncio
+import hashlib
 import logging
 import os
-from typing import Optional
+from typing import ClassVar, Optional
 
+from ai_companion.core.clients import GEMINI_SEMAPHORE, GROQ_SEMAPHORE, get_groq_client, get_http_client, register_reset_hook
+from ai_companion.core.env import require_env_vars
 from ai_companion.core.exceptions import TextToImageError
 from ai_companion.core.prompts import IMAGE_ENHANCEMENT_PROMPT, IMAGE_SCENARIO_PROMPT
 from ai_companion.settings import settings
+from cachetools import LRUCache
 from langchain_groq import ChatGroq
 from pydantic import Field, BaseModel
 from langchain_core.prompts import PromptTemplate
 from google import genai
 from google.genai import types
 
+# enhanced prompts and scenarios keyed on a hash of their input, so repeated requests skip the LLM call
+_ENHANCED_PROMPT_CACHE: LRUCache = LRUCache(maxsize=1024)
+_SCENARIO_CACHE: LRUCache = LRUCache(maxsize=1024)
+
+# speaker labels for the chat history in the scenario prompt
+TYPE_LABELS = {"human": "Human", "ai": "AI", "system": "System", "tool": "Tool"}
+
 class ScenarioPrompt(BaseModel):
     """Class for the scenario response"""
 
@@ -24,27 +35,71 @@ class EnhancedPrompt(BaseModel):
     content: str = Field(..., description="The enhanced text prompt to generate an image")
 
 
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _write_image(image_data: bytes, output_path: str) -> None:
+    """Write image data to output_path, creating its directory if needed"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(image_data)
+
+
 class TextToImage:
     """A class to handle text-to-image generation using Gemini"""
 
     REQUIRED_ENV_VARS = ["GEMINI_API_KEY", "GROQ_API_KEY"]
 
+    _gemini_client: ClassVar[Optional[genai.Client]] = None
+
     def __init__(self):
-        self._validate_env_vars()
-        self._gemini_client: Optional[genai.Client] = None
+        require_env_vars(*self.REQUIRED_ENV_VARS)
         self.logger = logging.getLogger(__name__)
-    
-    def _validate_env_vars(self) -> None:
-        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
-        if missing_vars:
-            raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+        # the prompt | structured model chains are built once and reused by every call
+        self._scenario_chain = (
+            PromptTemplate(
+                input_variables=["chat_history"],
+                template=IMAGE_SCENARIO_PROMPT,
+            )
+            | ChatGroq(
+                model=settings.TEXT_MODEL_NAME,
+                api_key=settings.GROQ_API_KEY,
+                temperature=0.4,
+                max_tokens=settings.SCENARIO_MAX_TOKENS,
+                max_retries=2,
+                async_client=get_groq_client().chat.completions,
+            ).with_structured_output(ScenarioPrompt)
+        )
+        self._enhance_chain = (
+            PromptTemplate(
+                input_variables=["prompt"],
+                template=IMAGE_ENHANCEMENT_PROMPT,
+            )
+            | ChatGroq(
+                model=settings.TEXT_MODEL_NAME,
+                api_key=settings.GROQ_API_KEY,
+                temperature=0.25,
+                max_retries=2,
+                async_client=get_groq_client().chat.completions,
+            ).with_structured_output(EnhancedPrompt)
+        )
     
     @property
     def gemini_client(self) -> genai.Client:
         """Get or create a Gemini client instance using singleton pattern"""
-        if self._gemini_client is None:
-            self._gemini_client=genai.Client(api_key=settings.GEMINI_API_KEY)
+        if TextToImage._gemini_client is None:
+            TextToImage._gemini_client = genai.Client(
+                api_key=settings.GEMINI_API_KEY,
+                http_options=types.HttpOptions(httpx_async_client=get_http_client()),
+            )
         return self._gemini_client
+
+    @classmethod
+    def reset_client(cls) -> None:
+        """Drop the Gemini client after the shared HTTP client is closed"""
+        cls._gemini_client = None
     
     async def generate_image(self, prompt: str, output_path: str = "") -> bytes:
         """Generate an image from a prompt using Gemini"""
@@ -55,53 +110,43 @@ class TextToImage:
         try:
             self.logger.info(f"Generating image for prompt: {prompt}")
 
-            response = self.gemini_client.models.generate_images(
-                model=settings.TTI_MODEL_NAME,
-                prompt=prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=1,
-                    image_size="1024x768",                    
+            async with GEMINI_SEMAPHORE:
+                response = await self.gemini_client.aio.models.generate_images(
+                    model=settings.TTI_MODEL_NAME,
+                    prompt=prompt,
+                    config=types.GenerateImagesConfig(
+                        number_of_images=1,
+                        image_size="1024x768",                    
+                    )
                 )
-            )
 
-            image_data = base64.b64decode(response.data[0].b64_json)
+            image_data = response.generated_images[0].image.image_bytes
 
             if output_path:
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, "wb") as f:
-                    f.write(image_data)
-                self.logger(f"Image saved to {output_path}")
+                # writing a full-size image would block the event loop, so it runs in a worker thread
+                await asyncio.to_thread(_write_image, image_data, output_path)
+                self.logger.info(f"Image saved to {output_path}")
 
             return image_data
         
         except Exception as e:
             raise TextToImageError(f"Failed to generate image: {str(e)}") from e
     
-    async def create_scenario(self, chat_history: str) -> ScenarioPrompt:
+    async def create_scenario(self, chat_history: list) -> ScenarioPrompt:
         """Create a first-person narrative and corresponding image prompt based on chat history"""
 
         try:
-            formatted_history="\n".join([f"{msg.type.title()}: {msg.content}" for msg in chat_history[-5:]])
-
-            self.logger.info("Creating scenario in chat history...")
-
-            llm = ChatGroq(
-                model=settings.TEXT_MODEL_NAME,
-                api_key=settings.GROQ_API_KEY,
-                temperature=0.4,
-                max_tokens=2,
-            )
+            formatted_history = "\n".join(f"{TYPE_LABELS.get(msg.type, msg.type)}: {msg.content}" for msg in chat_history[-5:])
 
-            structured_llm = llm.with_structured_output(ScenarioPrompt)
+            cache_key = _content_hash(formatted_history)
+            if cache_key in _SCENARIO_CACHE:
+                return _SCENARIO_CACHE[cache_key]
 
-            chain =( PromptTemplate(
-                input_variables=["chat_history"],
-                template=IMAGE_SCENARIO_PROMPT
-            )
-            | structured_llm
-            )
+            self.logger.info("Creating scenario in chat history...")
 
-            scenario = chain.ainvoke({"chat_history": formatted_history})
+            async with GROQ_SEMAPHORE:
+                scenario = await self._scenario_chain.ainvoke({"chat_history": formatted_history})
+            _SCENARIO_CACHE[cache_key] = scenario
             self.logger.info(f"Created scenario: {scenario}")
 
             return scenario
@@ -112,28 +157,60 @@ class TextToImage:
     async def enhance_prompt(self, prompt: str) -> str:
         """Enhance a simple prompt with additional details and context"""
         try:
-            self.logger.info(f"Enhancing prompt: {prompt}")
-
-            llm = ChatGroq(
-                model=settings.TEXT_MODEL_NAME,
-                api_key=settings.GROQ_API_KEY,
-                temperature=0.25,
-                max_retries=2
-            )
-
-            structured_llm = llm.with_structured_output(EnhancedPrompt)
+            cache_key = _content_hash(prompt)
+            if cache_key in _ENHANCED_PROMPT_CACHE:
+                return _ENHANCED_PROMPT_CACHE[cache_key]
 
-            chain = (PromptTemplate(
-                input_variables=["prompt"],
-                template=IMAGE_ENHANCEMENT_PROMPT,
-            )
-            | structured_llm
-            )
+            self.logger.info(f"Enhancing prompt: {prompt}")
 
-            enhanced_prompt = chain.ainvoke({"prompt": prompt}).content
+            async with GROQ_SEMAPHORE:
+                enhanced_prompt = (await self._enhance_chain.ainvoke({"prompt": prompt})).content
+            _ENHANCED_PROMPT_CACHE[cache_key] = enhanced_prompt
             self.logger.info(f"Enhanced prompt: {enhanced_prompt}")
 
             return enhanced_prompt
         
         except Exception as e:
-            raise TextToImageError(f"Failed to enhance prompt: {str(e)}" )from e
\ No newline at end of file
+            raise TextToImageError(f"Failed to enhance prompt: {str(e)}" )from e
+
+    async def enhance_prompts(self, prompts: list[str]) -> list[str]:
+        """Enhance several prompts concurrently through enhance_prompt, sharing its cache and the Groq concurrency limit"""
+        cache_keys = [_content_hash(prompt) for prompt in prompts]
+
+        # hits are read before awaiting, since inserts made meanwhile can evict them from the cache;
+        # only prompts that aren't cached are sent, each distinct prompt once
+        enhanced = {}
+        misses = {}
+        for key, prompt in zip(cache_keys, prompts):
+            if key in _ENHANCED_PROMPT_CACHE:
+                enhanced[key] = _ENHANCED_PROMPT_CACHE[key]
+            else:
+                misses[key] = prompt
+        self.logger.info(f"Enhancing {len(misses)} of {len(prompts)} prompts")
+
+        results = await asyncio.gather(*(self.enhance_prompt(prompt) for prompt in misses.values()))
+        enhanced.update(zip(misses, results))
+
+        return [enhanced[key] for key in cache_keys]
+    
+    async def generate_scene(self, chat_history: list, seed_prompt: str, output_path: str = "") -> tuple[ScenarioPrompt, bytes]:
+        """Create a scenario and enhance the seed prompt concurrently, then generate an image from the enhanced prompt
+        
+        Args:
+            chat_history: Recent messages the scenario is based on
+            seed_prompt: Simple prompt describing the image to generate
+            output_path: Optional path to save the generated image to
+
+        Returns:
+            tuple[ScenarioPrompt, bytes]: The scenario and the generated image data
+        """
+        scenario, enhanced_prompt = await asyncio.gather(
+            self.create_scenario(chat_history),
+            self.enhance_prompt(seed_prompt),
+        )
+        image_data = await self.generate_image(enhanced_prompt, output_path)
+
+        return scenario, image_data
+
+
+register_reset_hook(TextToImage.reset_client)
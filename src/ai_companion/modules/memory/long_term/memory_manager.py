@@ -3,6 +3,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
+from ai_companion.core.clients import get_groq_client
 from ai_companion.core.prompts import MEMORY_ANALYSIS_PROMPT
 from ai_companion.modules.memory.long_term.vector_store import get_vector_store
 from ai_companion.settings import settings
@@ -27,9 +28,10 @@ class MemoryManager:
         self.logger = logging.getLogger(__name__)
         self.llm = ChatGroq(
             model=settings.SMALL_TEXT_MODEL_NAME,
-            api_key=settings.GEMINI_API_KEY,
+            api_key=settings.GROQ_API_KEY,
             temperature=0.1,
             max_retries=2,
+            async_client=get_groq_client().chat.completions,
         ).with_structured_output(schema=MemoryAnalysis)
 
     async def _analyze_memory(self, message: str) -> MemoryAnalysis:
@@ -66,7 +68,9 @@ class MemoryManager:
         if memories:
             for memory in memories:
                 self.logger.debug(f"Memory: '{memory.text}' (score: '{memory.score:.2f}')")
-            return [memory.text for memory in memories]
+            # ordered by id rather than score so the same memories always produce the same prompt text
+            return [memory.text for memory in sorted(memories, key=lambda memory: str(memory.id))]
+        return []
         
     def format_memories_for_prompt(self, memories: List[str]) -> str:
         """Format retrieved memories as bullet points."""
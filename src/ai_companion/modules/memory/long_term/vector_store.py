@@ -1,9 +1,9 @@
-import os
 from dataclasses import dataclass
 from datetime import datetime
 from functools import lru_cache
 from typing import List, Optional
 
+from ai_companion.core.env import require_env_vars
 from ai_companion.settings import settings
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, PointStruct, VectorParams
@@ -45,18 +45,11 @@ class VectorStore:
     
     def __init__(self) -> None:
         if not self._initialized:
-            self._validate_env_vars()
+            require_env_vars(*self.REQUIRED_ENV_VARS)
             self.model = SentenceTransformer(self.EMBEDDING_MODEL)
             self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
             self._initialized = True
     
-    def _validate_env_vars(self) -> None:
-        """Validate that all the required environment variables are set."""
-        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
-        
-        if missing_vars:
-            raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-    
     def _collection_exists(self) -> bool:
         """Check if the memory collection exists."""
         collections = self.client.get_collection().collections
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingCheckpoint:
+    """Checkpoint and pending writes of a thread that have not been persisted yet"""
+    put: Optional[tuple[RunnableConfig, Checkpoint, CheckpointMetadata, ChannelVersions]] = None
+    writes: list[tuple[RunnableConfig, Sequence[tuple[str, Any]], str, str]] = field(default_factory=list)
+
+
+def _queue_key(config: RunnableConfig) -> tuple[str, str]:
+    """Checkpoints are queued per (thread_id, checkpoint_ns), so a subgraph's checkpoints never replace the parent's"""
+    configurable = config["configurable"]
+    return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+
+class QueuedSaver(BaseCheckpointSaver):
+    """A checkpointer wrapper that coalesces checkpoint writes per thread and namespace and persists them in the background.
+
+    Only the latest checkpoint of a thread's namespace has to survive, so a checkpoint that is superseded while it is
+    still queued is dropped together with its pending writes. Reads of a thread wait for its queued writes first.
+    """
+
+    def __init__(self, saver: AsyncSqliteSaver):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self._pending: dict[tuple[str, str], PendingCheckpoint] = {}
+        self._flush_tasks: dict[tuple[str, str], asyncio.Task] = {}
+
+    @property
+    def config_specs(self) -> list:
+        return self.saver.config_specs
+
+    def get_next_version(self, current: Optional[Any], channel: Any) -> Any:
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        await self.aflush(config)
+        return await self.saver.aget_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        await self.aflush(config)
+        async for checkpoint_tuple in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        key = _queue_key(config)
+
+        # a newer checkpoint supersedes whatever is still queued for the thread's namespace
+        self._pending[key] = PendingCheckpoint(put=(config, checkpoint, metadata, new_versions))
+        self._schedule_flush(key)
+
+        thread_id, checkpoint_ns = key
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        key = _queue_key(config)
+        self._pending.setdefault(key, PendingCheckpoint()).writes.append((config, writes, task_id, task_path))
+        self._schedule_flush(key)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        for key in [key for key in self._pending if key[0] == thread_id]:
+            del self._pending[key]
+        await self.aflush({"configurable": {"thread_id": thread_id}})
+        await self.saver.adelete_thread(thread_id)
+
+    async def aflush(self, config: Optional[RunnableConfig] = None) -> None:
+        """Wait until the queued checkpoints of a thread, or of every thread if no config is given, are persisted"""
+        if config is None or "thread_id" not in config.get("configurable", {}):
+            tasks = list(self._flush_tasks.values())
+        else:
+            thread_id = config["configurable"]["thread_id"]
+            tasks = [task for key, task in self._flush_tasks.items() if key[0] == thread_id]
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def aclose(self) -> None:
+        """Persist every queued checkpoint, then close the wrapped saver's connection"""
+        await self.aflush()
+        await self.saver.conn.close()
+
+    def _schedule_flush(self, key: tuple[str, str]) -> None:
+        if key not in self._flush_tasks:
+            self._flush_tasks[key] = asyncio.create_task(self._drain(key))
+
+    async def _drain(self, key: tuple[str, str]) -> None:
+        """Persist the queued checkpoint of a thread's namespace until nothing is left in its queue"""
+        try:
+            while (pending := self._pending.pop(key, None)) is not None:
+                try:
+                    if pending.put is not None:
+                        await self.saver.aput(*pending.put)
+                    for write in pending.writes:
+                        await self.saver.aput_writes(*write)
+                except Exception as e:
+                    logger.error(f"Failed to persist checkpoint for thread '{key[0]}' (namespace '{key[1]}'): {e}", exc_info=True)
+        finally:
+            self._flush_tasks.pop(key, None)
@@ -0,0 +1,32 @@
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from ai_companion.modules.memory.short_term.queued_saver import QueuedSaver
+from ai_companion.settings import settings
+
+# WAL lets readers run alongside the single writer; NORMAL sync is durable in WAL mode without an fsync per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+)
+
+
+async def create_short_term_memory(db_path: str = settings.SHORT_TERM_MEMORY_DB_PATH) -> QueuedSaver:
+    """Open the short-term memory database once and wrap it in a checkpointer.
+
+    Checkpoint writes are queued and persisted in the background. The connection is meant to live as long
+    as the app; on shutdown, `await saver.aclose()` persists the queued checkpoints and closes it.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        QueuedSaver: Checkpointer backed by the tuned connection
+    """
+    conn = await aiosqlite.connect(db_path)
+    for pragma in SQLITE_PRAGMAS:
+        await conn.execute(pragma)
+    return QueuedSaver(AsyncSqliteSaver(conn))
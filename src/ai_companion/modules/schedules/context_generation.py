@@ -1,5 +1,7 @@
-from datetime import datetime
-from typing import Dict, Optional
+from bisect import bisect_right
+from datetime import datetime, time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 from ai_companion.core.schedules import (
     SUNDAY_SCHEDULE,
@@ -11,17 +13,24 @@ from ai_companion.core.schedules import (
     SATURDAY_SCHEDULE
 )
 
+# schedules indexed by weekday (0 = Monday, 6 = Sunday)
+_SCHEDULE_BY_DAY: Tuple[Dict[str, str], ...] = (
+    MONDAY_SCHEDULE,
+    TUESDAY_SCHEDULE,
+    WEDNESDAY_SCHEDULE,
+    THURSDAY_SCHEDULE,
+    FRIDAY_SCHEDULE,
+    SATURDAY_SCHEDULE,
+    SUNDAY_SCHEDULE,
+)
+
 class ScheduleContextGenerator:
     """Class to generate context about Tela's current activity based on schedule"""
-    SCHEDULE = {
-        0: MONDAY_SCHEDULE,
-        1: TUESDAY_SCHEDULE,
-        2: WEDNESDAY_SCHEDULE,
-        3: THURSDAY_SCHEDULE,
-        4: FRIDAY_SCHEDULE,
-        5: SATURDAY_SCHEDULE,
-        6: SUNDAY_SCHEDULE
-    }
+
+    # (start_time, end_time, activity) per weekday sorted by start time, with the start times alongside for
+    # bisecting; parsed once when the module is loaded
+    _PARSED_SCHEDULE: Tuple[List[Tuple[time, time, str]], ...] = ()
+    _SLOT_STARTS: Tuple[List[time], ...] = ()
 
     @staticmethod
     def _parse_time_range(time_range: str) -> tuple[datetime.time, datetime.time]:
@@ -31,6 +40,22 @@ class ScheduleContextGenerator:
         end_time = datetime.strptime(end_str, "%H:%M").time()
         return start_time, end_time
     
+    @classmethod
+    def _parse_schedule(cls, schedule: Dict[str, str]) -> List[Tuple[time, time, str]]:
+        """Parse a day's schedule into non-overlapping slots sorted by start time.
+
+        Ranges that wrap past midnight (e.g '23:00-06:00') are split into two ranges that don't.
+        """
+        slots = []
+        for time_range, activity in schedule.items():
+            start_time, end_time = cls._parse_time_range(time_range)
+            if start_time > end_time:
+                slots.append((start_time, time.max, activity))
+                slots.append((time.min, end_time, activity))
+            else:
+                slots.append((start_time, end_time, activity))
+        return sorted(slots, key=lambda slot: slot[0])
+    
     @classmethod
     def get_current_activity(cls) -> Optional[str]:
         """Get Tela's current activity based on the currrent time and day of the week.
@@ -38,20 +63,23 @@ class ScheduleContextGenerator:
         Returns:
             str: Description of current activity or None if no current matching time slot is found.
         """
-        current_time = datetime.time()
-        current_day = datetime.weekday()
-
-        schedule = cls.SCHEDULE.get(current_day, {})
+        now = datetime.now()
+        return cls._lookup_activity(now.weekday(), now.hour * 60 + now.minute)
+    
+    @classmethod
+    @lru_cache(maxsize=8)
+    def _lookup_activity(cls, current_day: int, minute_of_day: int) -> Optional[str]:
+        """Find the activity for a day and minute of the day; cached since the answer only changes at slot boundaries"""
+        current_time = time(minute_of_day // 60, minute_of_day % 60)
 
-        for time_range, activity in schedule.items():
-            start_time, end_time = cls._parse_time_range(time_range)
+        # the last slot starting at or before the current time is the only one that can contain it
+        index = bisect_right(cls._SLOT_STARTS[current_day], current_time) - 1
+        if index < 0:
+            return None
 
-            if start_time > end_time:
-                if start_time <= current_time <= end_time:
-                    return activity
-            else:
-                if start_time <= current_time <= end_time:
-                    return activity
+        _, end_time, activity = cls._PARSED_SCHEDULE[current_day][index]
+        if current_time <= end_time:
+            return activity
         
         return None
     
@@ -65,4 +93,12 @@ class ScheduleContextGenerator:
         Returns:
             Dict[str, str]: Schedule for the specific day
         """
-        return cls.SCHEDULE.get(day, {})
+        return _SCHEDULE_BY_DAY[day] if 0 <= day < 7 else {}
+
+
+ScheduleContextGenerator._PARSED_SCHEDULE = tuple(
+    ScheduleContextGenerator._parse_schedule(schedule) for schedule in _SCHEDULE_BY_DAY
+)
+ScheduleContextGenerator._SLOT_STARTS = tuple(
+    [start_time for start_time, _, _ in slots] for slots in ScheduleContextGenerator._PARSED_SCHEDULE
+)
@@ -1,10 +1,7 @@
-import os
-import tempfile
-from typing import Optional
-
-from ai_companion.settings import settings
+from ai_companion.core.clients import get_groq_client
+from ai_companion.core.env import require_env_vars
 from ai_companion.core.exceptions import SpeechToTextError
-from groq import Groq
+from groq import AsyncGroq
 
 
 class SpeechToText:
@@ -14,20 +11,11 @@ class SpeechToText:
 
     def __init__(self):
         """Initialize the SpeechToText class and validate environment variables."""
-        self._validate_env_vars()
-        self._client: Optional[Groq] = None
-    
-    def _validate_env_vars(self) -> None:
-        """Validate that all the required environment variables are set."""
-        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
-        if missing_vars:
-            raise ValueError(f"Missing required environment variables: '{', '.join(missing_vars)}'")
-        
+        require_env_vars(*self.REQUIRED_ENV_VARS)
+
     @property
-    def client(self) -> Groq:
-        if self._client is None:
-            self._client=Groq(api_key=settings.GROQ_API_KEY)
-        return self._client
+    def client(self) -> AsyncGroq:
+        return get_groq_client()
     
     async def transcribe(self, audio_data:bytes) -> str:
         """Convert speech to text using Groq's Whisper model.
@@ -46,26 +34,18 @@ class SpeechToText:
             raise ValueError("Audio data cannot be empty.")
         
         try:
-            # create a temp file with .wav extension
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-
-            try:
-                with open(temp_file, "rb") as audio_file:
-                    transcription=self.client.audio.transcriptions.create(
-                        file=audio_file,
-                        model="whisper-large-v3-turbo",
-                        language="en",
-                        response_format="text"
-                    )
-                
-                if not transcription:
-                    raise SpeechToTextError("Transcription result is empty")
-                
-                return transcription
-            finally:
-                os.unlink(temp_file_path)
+            # the bytes are uploaded as-is under a .wav file name, without a round trip through a temp file
+            transcription=await self.client.audio.transcriptions.create(
+                file=("audio.wav", audio_data),
+                model="whisper-large-v3-turbo",
+                language="en",
+                response_format="text"
+            )
+            
+            if not transcription:
+                raise SpeechToTextError("Transcription result is empty")
+            
+            return transcription
         
         except Exception as e:
             raise SpeechToTextError(f"Speech-to-text conversion failed: {str(e)}") from e
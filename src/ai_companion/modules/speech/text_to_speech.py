@@ -1,33 +1,73 @@
-import os
-from typing import Optional
+from io import BytesIO
+from typing import AsyncIterator, ClassVar, Optional
 
+from ai_companion.core.clients import ELEVENLABS_SEMAPHORE, get_http_client, register_reset_hook
+from ai_companion.core.env import require_env_vars
 from ai_companion.core.exceptions import TextToSpeechError
 from ai_companion.settings import settings
-from elevenlabs import ElevenLabs, VoiceSettings
+from elevenlabs import AsyncElevenLabs, VoiceSettings
 
 
 class TextToSpeech:
     """A class to handle text-to-speech operations using Elevenlabs"""
 
-    REQUIRED_ENV_VARS=["ELEVENLABS_API_KEY", "ELEVENLABS_VOICE_ID"]
+    REQUIRED_ENV_VARS = ["ELEVENLABS_API_KEY", "ELEVENLABS_VOICE_ID"]
+
+    _client: ClassVar[Optional[AsyncElevenLabs]] = None
 
     def __init__(self):
-        self._validate_env_vars()
-        self._client: Optional[ElevenLabs] = None
-
-    def validate_env_vars(self) -> None:
-        """Initialize TextToSpeech class and validate environment variables"""
-        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
-        if missing_vars:
-            raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-        
+        require_env_vars(*self.REQUIRED_ENV_VARS)
+
     @property
-    def client(self) -> ElevenLabs:
+    def client(self) -> AsyncElevenLabs:
         """Get or create an Elevenlabs client instance using the singleton pattern"""
-        if self._client is None:
-            self._client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+        if TextToSpeech._client is None:
+            TextToSpeech._client = AsyncElevenLabs(api_key=settings.ELEVENLABS_API_KEY, httpx_client=get_http_client())
         return self._client
+
+    @classmethod
+    def reset_client(cls) -> None:
+        """Drop the ElevenLabs client after the shared HTTP client is closed"""
+        cls._client = None
     
+    async def synthesize_stream(self, text: str) -> AsyncIterator[bytes]:
+        """Convert text to speech using ElevenLabs, yielding the audio chunks as they arrive
+
+        Args:
+            text: Text to convert to speech
+
+        Yields:
+            bytes: Chunks of audio data
+
+        Raises:
+            ValueError: If the input text is empty or too long
+            TextToSpeechError: If the text-to-speech conversion fails
+        """
+
+        # the O(1) length check runs first, and isspace() checks for blank text without copying it like strip() does
+        if len(text) > 5000:
+            raise ValueError("Input length exceeds maximum length of 5000 characters.")
+
+        if not text or text.isspace():
+            raise ValueError("Input text cannot be empty.")
+        
+        try:
+            # the slot is held until the stream is exhausted, since the request stays in flight until then
+            async with ELEVENLABS_SEMAPHORE:
+                async for chunk in self.client.text_to_speech.convert(
+                    voice_id=settings.ELEVENLABS_VOICE_ID,
+                    text=text,
+                    model_id=settings.TTS_MODEL_NAME,
+                    voice_settings= VoiceSettings(
+                        stability=0.5,
+                        similarity_boost=0.5
+                    )
+                ):
+                    yield chunk
+        
+        except Exception as e:
+            raise TextToSpeechError(f"Text-to-speech conversion failed: {str(e)}") from e
+
     async def synthesize(self, text: str) -> bytes:
         """Convert text to speech using ElevenLabs
         
@@ -42,29 +82,16 @@ class TextToSpeech:
             TextToSpeechError: If the text-to-speech conversion fails
         """
 
-        if not text.strip():
-            raise ValueError("Input text cannot be empty.")
+        # chunks are appended to one growing buffer as they stream in
+        audio_buffer = BytesIO()
+        async for chunk in self.synthesize_stream(text):
+            audio_buffer.write(chunk)
+        audio_bytes = audio_buffer.getvalue()
         
-        if len(text) > 5000:
-            raise ValueError("Input length exceeds maximum length of 5000 characters.")
-        
-        try:
-            audio_generator = self.client.text_to_speech.convert(
-                voice_id=settings.ELEVENLABS_VOICE_ID,
-                text=text,
-                model_id=settings.TTS_MODEL_NAME,
-                voice_settings= VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.5
-                )
-            )
-
-            audio_bytes = b"".join(audio_generator)
-            
-            if not audio_bytes:
-                raise TextToSpeechError("Generated audio is empty")
-            
-            return audio_bytes
+        if not audio_bytes:
+            raise TextToSpeechError("Generated audio is empty")
         
-        except Exception as e:
-            raise TextToSpeechError(f"Text-to-speech conversion failed: {str(e)}") from e
\ No newline at end of file
+        return audio_bytes
+
+
+register_reset_hook(TextToSpeech.reset_client)
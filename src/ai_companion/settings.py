@@ -24,6 +24,8 @@ class Settings(BaseSettings):
     ROUTER_MESSAGES_TO_ANALYZE: int = 3
     TOTAL_MESSAGES_AFTER_SUMMARY_TRIGGER: int = 20
     TOTAL_MESSAGES_AFTER_SUMMARY: int = 5
+    LLM_MAX_CONCURRENCY: int = 8
+    SCENARIO_MAX_TOKENS: int = 512
 
     SHORT_TERM_MEMORY_DB_PATH: str = "/ava-agent/app/data/memory.db"
 
@@ -0,0 +1,44 @@
+import os
+
+# the settings are read from the environment when the graph modules are imported
+for var in ("GROQ_API_KEY", "ELEVENLABS_API_KEY", "ELEVENLABS_VOICE_ID", "GEMINI_API_KEY", "QDRANT_API_KEY", "QDRANT_URL"):
+    os.environ.setdefault(var, "test")
+
+from langgraph.graph import END, START
+
+from ai_companion.graph.edges import select_workflow, should_summarize_conversation
+from ai_companion.graph.graph import create_workflow_graph
+from ai_companion.settings import settings
+
+
+def test_graph_compiles():
+    assert create_workflow_graph().compile() is not None
+
+
+def test_edges_connect_existing_nodes():
+    builder = create_workflow_graph()
+    nodes = set(builder.nodes)
+
+    for source, target in builder.edges:
+        assert source in nodes | {START}
+        assert target in nodes | {END}
+
+    for sources, target in builder.waiting_edges:
+        assert set(sources) <= nodes
+        assert target in nodes
+
+    for source, branches in builder.branches.items():
+        assert source in nodes
+        for branch in branches.values():
+            assert branch.ends is not None
+            assert set(branch.ends.values()) <= nodes | {END}
+
+
+def test_conditional_edges_return_existing_nodes():
+    nodes = set(create_workflow_graph().nodes)
+
+    for workflow in ("conversation", "image", "audio"):
+        assert select_workflow({"workflow": workflow}) in nodes
+
+    for message_count in (0, settings.TOTAL_MESSAGES_AFTER_SUMMARY_TRIGGER + 1):
+        assert should_summarize_conversation({"messages": [None] * message_count}) in nodes | {END}